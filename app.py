@@ -1,3 +1,30 @@
+import argparse
+
+# The parser also runs when another tool (WSGI server, test runner) imports this module: only
+# `python app.py` owns -h, and exact option names keep other tools' flags from matching ours
+parser = argparse.ArgumentParser(
+    description='Quran SRT processing server', add_help=__name__ == '__main__', allow_abbrev=False
+)
+parser.add_argument('--profile-startup', action='store_true', help='report import and init time per module')
+parser.add_argument('--eager', action='store_true', help='build processors at startup instead of on first use')
+parser.add_argument('--transcription-backend', choices=['whisper', 'stub'], default='whisper',
+                    help='speech-to-text backend; stub returns corpus verses without running Whisper')
+parser.add_argument('--stub-latency', type=float, default=1.0, help='seconds the stub backend takes per file')
+parser.add_argument('--stub-noise', type=float, default=0.0,
+                    help='fraction of stub words dropped or misspelled, to exercise fuzzy matching')
+parser.add_argument('--storage-ttl', type=float, default=24.0, help='hours an unused upload or job output is kept')
+parser.add_argument('--storage-quota', type=float, default=5.0,
+                    help='GiB of uploads and outputs kept before the least recently used are evicted')
+parser.add_argument('--sweep-interval', type=float, default=600.0, help='seconds between storage sweeps')
+args, _ = parser.parse_known_args()
+
+# --profile-startup times every import from here on, so install it before anything else
+profiler = None
+if args.profile_startup:
+    from startup_profiler import StartupProfiler
+    profiler = StartupProfiler()
+    profiler.install()
+
 from flask import Flask, render_template, request, jsonify, send_file
 from flask_cors import CORS
 import os
@@ -8,9 +35,32 @@ from controllers.api_controller import APIController
 app = Flask(__name__)
 CORS(app)
 
-# Initialize controllers
+# Initialize controllers; --eager builds the processors up front instead of on first request
 main_controller = MainController()
-api_controller = APIController()
+backend_options = {}
+if args.transcription_backend == 'stub':
+    backend_options = {'latency': args.stub_latency, 'noise': args.stub_noise}
+api_controller = APIController(
+    lazy=not args.eager,
+    profiler=profiler,
+    transcription_backend=args.transcription_backend,
+    backend_options=backend_options,
+    storage_options={
+        'ttl_seconds': args.storage_ttl * 3600,
+        'quota_bytes': int(args.storage_quota * 1024 ** 3),
+        'sweep_interval': args.sweep_interval
+    }
+)
+
+if profiler:
+    profiler.uninstall()
+    print(profiler.report())
+
+# The debug reloader runs this module in a parent process too; its pins would always be
+# empty, so the sweeper is started on the first request, which only the serving process gets
+@app.before_request
+def start_storage_sweeper():
+    api_controller.storage.start_sweeper()
 
 # Register routes
 @app.route('/')
@@ -45,10 +95,22 @@ def process_srt():
 def download_file(filename):
     return api_controller.download_file(filename)
 
+@app.route('/api/download/<job_id>/<filename>')
+def download_job_file(job_id, filename):
+    return api_controller.download_file(filename, job_id)
+
 @app.route('/api/model_status')
 def model_status():
     return api_controller.get_model_status()
 
+@app.route('/api/job_status/<job_id>')
+def job_status(job_id):
+    return api_controller.get_job_status(job_id)
+
+@app.route('/api/storage_stats')
+def storage_stats():
+    return api_controller.get_storage_stats()
+
 if __name__ == '__main__':
     # Create necessary directories
     os.makedirs('uploads', exist_ok=True)
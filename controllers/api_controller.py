@@ -5,16 +5,67 @@ import threading
 from models.quran_data import QuranDataModel
 from models.audio_processor import AudioProcessor
 from models.srt_processor import SRTProcessor
+from models.storage_manager import StorageManager
+from models.transcription_backends import create_backend
 from werkzeug.utils import secure_filename
 import traceback
 
 class APIController:
-    def __init__(self):
-        self.quran_model = QuranDataModel()
-        self.audio_processor = AudioProcessor()
-        self.srt_processor = SRTProcessor()
+    def __init__(self, lazy=True, profiler=None, transcription_backend='whisper', backend_options=None,
+                 storage_options=None):
+        self.profiler = profiler
+        self.transcription_backend = transcription_backend
+        self.backend_options = backend_options or {}
+        self.storage_options = storage_options or {}
         self.upload_folder = 'uploads'
         self.output_folder = 'outputs'
+        self._quran_model = None
+        self._audio_processor = None
+        self._srt_processor = None
+        self._init_lock = threading.RLock()
+        self.jobs = {}  # job_id -> {'status', 'error', 'files'} for background audio jobs
+        self._jobs_lock = threading.Lock()
+        
+        self.storage = self._build('storage', lambda: StorageManager(
+            self.upload_folder, self.output_folder, **self.storage_options
+        ))
+        
+        if not lazy:
+            self.audio_processor
+    
+    def _build(self, name, factory):
+        """Construct a component, timing it when startup profiling is enabled"""
+        if self.profiler is None:
+            return factory()
+        with self.profiler.measure_init(name):
+            return factory()
+    
+    @property
+    def quran_model(self):
+        """Shared Quran data model, constructed on first use"""
+        with self._init_lock:
+            if self._quran_model is None:
+                self._quran_model = self._build('quran_model', QuranDataModel)
+            return self._quran_model
+    
+    @property
+    def srt_processor(self):
+        """SRT processor, constructed on first use"""
+        with self._init_lock:
+            if self._srt_processor is None:
+                self._srt_processor = self._build('srt_processor', lambda: SRTProcessor(self.quran_model))
+            return self._srt_processor
+    
+    @property
+    def audio_processor(self):
+        """Audio processor, constructed on first use"""
+        with self._init_lock:
+            if self._audio_processor is None:
+                self._audio_processor = self._build('audio_processor', lambda: AudioProcessor(
+                    self.srt_processor,
+                    create_backend(self.transcription_backend, self.quran_model, **self.backend_options)
+                ))
+            return self._audio_processor
         
     def get_surahs(self):
         """Get all surahs data"""
@@ -41,6 +92,7 @@ class APIController:
         """Get model loading status"""
         try:
             status = self.audio_processor.get_model_status()
+            status['fast_path_stats'] = self.srt_processor.get_fast_path_stats()
             return jsonify({'success': True, 'data': status})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
@@ -56,10 +108,9 @@ class APIController:
                 return jsonify({'success': False, 'error': 'No file selected'})
             
             filename = secure_filename(file.filename)
-            filepath = os.path.join(self.upload_folder, filename)
-            file.save(filepath)
+            filepath, deduplicated = self.storage.save_upload(file)
             
-            return jsonify({'success': True, 'filename': filename, 'filepath': filepath})
+            return jsonify({'success': True, 'filename': filename, 'filepath': filepath, 'deduplicated': deduplicated})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
@@ -74,10 +125,9 @@ class APIController:
                 return jsonify({'success': False, 'error': 'No file selected'})
             
             filename = secure_filename(file.filename)
-            filepath = os.path.join(self.upload_folder, filename)
-            file.save(filepath)
+            filepath, deduplicated = self.storage.save_upload(file)
             
-            return jsonify({'success': True, 'filename': filename, 'filepath': filepath})
+            return jsonify({'success': True, 'filename': filename, 'filepath': filepath, 'deduplicated': deduplicated})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
@@ -89,25 +139,70 @@ class APIController:
             selected_surahs = data.get('selected_surahs', [])
             min_words = data.get('min_words', 5)
             merge_enabled = data.get('merge_enabled', False)
+            word_timestamps = data.get('word_timestamps', False)
+            filename = secure_filename(data.get('filename') or '')
             
             if not filepath or not os.path.exists(filepath):
                 return jsonify({'success': False, 'error': 'File not found'})
             
+            job_id, job_dir = self.storage.create_job()
+            self.storage.pin(filepath)
+            self.storage.pin(job_dir)
+            self._set_job(job_id, 'processing')
+            
             # Start processing in background
             def process():
                 try:
                     result = self.audio_processor.process_audio_file(
-                        filepath, selected_surahs, min_words, merge_enabled
+                        filepath, selected_surahs, min_words, merge_enabled, word_timestamps, job_dir, filename
                     )
+                    result['job_id'] = job_id
                     self.audio_processor.processing_result = result
+                    self._set_job(job_id, 'done', files=self._job_files(result))
                 except Exception as e:
                     self.audio_processor.processing_error = str(e)
                     self.audio_processor.processing_error_traceback = traceback.format_exc()
+                    self._set_job(job_id, 'error', error=str(e))
+                finally:
+                    self.storage.unpin(filepath)
+                    self.storage.unpin(job_dir)
             
             thread = threading.Thread(target=process)
             thread.start()
             
-            return jsonify({'success': True, 'message': 'Processing started'})
+            return jsonify({'success': True, 'message': 'Processing started', 'job_id': job_id})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+    
+    def _set_job(self, job_id, status, error=None, files=None):
+        """Record the state of a background job, forgetting finished jobs whose files were swept"""
+        with self._jobs_lock:
+            for known_id in list(self.jobs):
+                if self.jobs[known_id]['status'] != 'processing' and self.storage.get_job_dir(known_id) is None:
+                    del self.jobs[known_id]
+            self.jobs[job_id] = {'status': status, 'error': error, 'files': files or {}}
+    
+    def _job_files(self, result):
+        """Get the downloadable output filenames of an audio processing result"""
+        processed = result['processed_result']
+        paths = {
+            'raw_srt': result['raw_srt_path'],
+            'processed_srt': processed['processed_srt_path'],
+            'ranges': processed['ranges_path'],
+            'backup': processed['backup_path'],
+            'words': processed['words_path']
+        }
+        return {kind: os.path.basename(path) for kind, path in paths.items() if path}
+    
+    def get_job_status(self, job_id):
+        """Get the status and output filenames of a background job"""
+        try:
+            with self._jobs_lock:
+                job = self.jobs.get(job_id)
+                job = dict(job) if job else None
+            if job is None:
+                return jsonify({'success': False, 'error': 'Job not found'})
+            return jsonify({'success': True, 'data': job})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
     
@@ -119,25 +214,51 @@ class APIController:
             selected_surahs = data.get('selected_surahs', [])
             min_words = data.get('min_words', 5)
             merge_enabled = data.get('merge_enabled', False)
+            filename = secure_filename(data.get('filename') or '')
             
             if not filepath or not os.path.exists(filepath):
                 return jsonify({'success': False, 'error': 'File not found'})
             
-            result = self.srt_processor.process_srt_file(
-                filepath, selected_surahs, min_words, merge_enabled
-            )
+            # Work on a copy inside the job directory so every output lands there
+            job_id, job_dir = self.storage.create_job()
+            self.storage.pin(job_dir)
+            try:
+                job_filepath = self.storage.stage_in_job(filepath, job_dir, filename)
+                result = self.srt_processor.process_srt_file(
+                    job_filepath, selected_surahs, min_words, merge_enabled
+                )
+            finally:
+                self.storage.unpin(job_dir)
+            result['job_id'] = job_id
             
             return jsonify({'success': True, 'data': result})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e), 'traceback': traceback.format_exc()})
     
-    def download_file(self, filename):
+    def download_file(self, filename, job_id=None):
         """Download processed file"""
         try:
-            filepath = os.path.join(self.output_folder, filename)
+            if job_id is not None:
+                folder = self.storage.get_job_dir(job_id)
+                if folder is None:
+                    return jsonify({'success': False, 'error': 'Job not found'})
+            else:
+                folder = self.output_folder
+            
+            filepath = os.path.join(folder, secure_filename(filename))
             if os.path.exists(filepath):
-                return send_file(filepath, as_attachment=True)
+                self.storage.touch(folder)
+                # send_file resolves relative paths against the app root, not the working directory
+                return send_file(os.path.abspath(filepath), as_attachment=True)
             else:
                 return jsonify({'success': False, 'error': 'File not found'})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)})
+    
+    def get_storage_stats(self):
+        """Get storage usage statistics"""
+        try:
+            stats = self.storage.get_usage_stats()
+            return jsonify({'success': True, 'data': stats})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
\ No newline at end of file
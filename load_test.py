@@ -0,0 +1,209 @@
+"""Load generator for the HTTP API.
+
+Start the server with the stub backend so no Whisper inference runs:
+
+    python app.py --transcription-backend stub --stub-latency 0.5 --stub-noise 0.2
+    python load_test.py --url http://localhost:5000 --concurrency 1,4,16 --jobs 50
+"""
+import json
+import time
+import uuid
+import argparse
+import threading
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+class LoadTester:
+    def __init__(self, base_url, poll_interval=0.2, job_timeout=60.0, word_timestamps=False):
+        self.base_url = base_url.rstrip('/')
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.word_timestamps = word_timestamps
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear collected measurements"""
+        self.latencies = defaultdict(list)  # endpoint -> seconds
+        self.errors = defaultdict(int)
+        self.job_latencies = []
+        self.job_errors = 0
+    
+    def _request(self, endpoint, path, data=None, headers=None, check=None):
+        """Send one request and return (content type, body)
+        
+        check(content_type, body) returns an error message for responses that failed at the
+        application level; only requests that pass it are recorded as latency samples.
+        """
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.job_timeout) as response:
+                body = response.read()
+                content_type = response.headers.get('Content-Type', '')
+            error = check(content_type, body) if check else None
+            if error:
+                raise RuntimeError(f'{endpoint}: {error}')
+        except Exception:
+            with self._lock:
+                self.errors[endpoint] += 1
+            raise
+        with self._lock:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+        return content_type, body
+    
+    def _json(self, endpoint, path, payload=None, data=None, headers=None):
+        """Send a request and decode its JSON response, counting success=false as an error"""
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers = {'Content-Type': 'application/json'}
+        _, body = self._request(endpoint, path, data, headers, check=json_error)
+        return json.loads(body)
+    
+    def _upload(self, filename, content):
+        """Upload an audio file as multipart/form-data"""
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+        headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        return self._json('upload_audio', '/api/upload_audio', data=body, headers=headers)
+    
+    def load_model(self):
+        """Ask the server to load its transcription backend and wait until it is ready"""
+        self._json('load_model', '/api/load_model', {})
+        deadline = time.time() + self.job_timeout
+        while time.time() < deadline:
+            status = self._json('model_status', '/api/model_status')['data']
+            if status['status'] == 'loaded':
+                return status
+            if status['status'] == 'error':
+                raise RuntimeError(status['message'])
+            time.sleep(self.poll_interval)
+        raise TimeoutError('Model did not load in time')
+    
+    def run_job(self, job_number):
+        """Upload, process, poll and download one file; returns end-to-end seconds"""
+        start = time.perf_counter()
+        filename = f'loadtest_{job_number}_{uuid.uuid4().hex[:8]}.wav'
+        upload = self._upload(filename, f'{filename}\n'.encode() * 64)
+        
+        job_id = self._json('process_audio', '/api/process_audio', {
+            'filepath': upload['filepath'],
+            'filename': upload['filename'],
+            'selected_surahs': [],
+            'merge_enabled': False,
+            'word_timestamps': self.word_timestamps
+        })['job_id']
+        
+        # The status page the web UI polls is part of the load, once per job
+        status = self._json('model_status', '/api/model_status')['data']
+        if status['status'] != 'loaded':
+            raise RuntimeError(f"model_status: model is {status['status']}")
+        
+        deadline = time.time() + self.job_timeout
+        while time.time() < deadline:
+            job = self._json('job_status', f'/api/job_status/{job_id}')['data']
+            if job['status'] == 'error':
+                raise RuntimeError(f"Job {job_id} failed: {job['error']}")
+            if job['status'] == 'done':
+                # Failed downloads answer with a JSON error instead of the file
+                self._request('download', f"/api/download/{job_id}/{job['files']['processed_srt']}", check=json_error)
+                return time.perf_counter() - start
+            time.sleep(self.poll_interval)
+        raise TimeoutError(f'Job {job_id} did not finish in time')
+    
+    def _run_job_safely(self, job_number):
+        try:
+            elapsed = self.run_job(job_number)
+            with self._lock:
+                self.job_latencies.append(elapsed)
+        except Exception:
+            with self._lock:
+                self.job_errors += 1
+    
+    def run_level(self, concurrency, jobs):
+        """Run a number of jobs at a fixed concurrency and summarize the results"""
+        self.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self._run_job_safely, range(jobs)))
+        elapsed = time.perf_counter() - start
+        
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies[endpoint]
+            total = len(latencies) + self.errors[endpoint]
+            endpoints[endpoint] = {
+                'requests': total,
+                'p50': percentile(latencies, 50),
+                'p99': percentile(latencies, 99),
+                'error_rate': self.errors[endpoint] / total if total else 0
+            }
+        
+        return {
+            'concurrency': concurrency,
+            'jobs': jobs,
+            'completed': len(self.job_latencies),
+            'error_rate': self.job_errors / jobs if jobs else 0,
+            'throughput': len(self.job_latencies) / elapsed if elapsed else 0,
+            'p50': percentile(self.job_latencies, 50),
+            'p99': percentile(self.job_latencies, 99),
+            'endpoints': endpoints
+        }
+
+def json_error(content_type, body):
+    """Get the error message of a JSON response with success=false, or None"""
+    if 'application/json' not in content_type:
+        return None
+    result = json.loads(body)
+    return None if result.get('success') else result.get('error') or 'request failed'
+
+def percentile(values, pct):
+    """Nearest-rank percentile of values, or None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def format_ms(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.1f}'
+
+def format_report(results):
+    """Format load test results as a text table"""
+    lines = [f"{'concurrency':>11}{'jobs':>7}{'done':>7}{'err %':>8}{'jobs/s':>9}{'p50 ms':>10}{'p99 ms':>10}"]
+    for r in results:
+        lines.append(
+            f"{r['concurrency']:>11}{r['jobs']:>7}{r['completed']:>7}{r['error_rate'] * 100:>8.1f}"
+            f"{r['throughput']:>9.2f}{format_ms(r['p50']):>10}{format_ms(r['p99']):>10}"
+        )
+        for endpoint, stats in r['endpoints'].items():
+            lines.append(
+                f"{'':>11}  {endpoint:<16}{stats['requests']:>7}{stats['error_rate'] * 100:>8.1f}"
+                f"{'':>9}{format_ms(stats['p50']):>10}{format_ms(stats['p99']):>10}"
+            )
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the QTS HTTP API')
+    parser.add_argument('--url', default='http://localhost:5000', help='server base URL')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--jobs', type=int, default=20, help='jobs to run at each concurrency level')
+    parser.add_argument('--poll-interval', type=float, default=0.2, help='seconds between status polls')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds before a job counts as failed')
+    parser.add_argument('--word-timestamps', action='store_true', help='request word-level timestamps')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    
+    tester = LoadTester(args.url, args.poll_interval, args.timeout, args.word_timestamps)
+    tester.load_model()
+    
+    results = [tester.run_level(int(level), args.jobs) for level in args.concurrency.split(',')]
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,12 +1,10 @@
 import os
-import whisper
-import threading
-import time
+from models.transcription_backends import WhisperBackend
 
 class AudioProcessor:
-    def __init__(self):
-        self.model = None
-        self.model_path = os.path.join('models', 'whisper')
+    def __init__(self, srt_processor=None, backend=None):
+        self.srt_processor = srt_processor
+        self.backend = backend or WhisperBackend()
         self.loading_progress = 0
         self.loading_status = 'idle'  # idle, loading, loaded, error
         self.loading_message = ''
@@ -18,6 +16,7 @@ class AudioProcessor:
         """Get current model status"""
         return {
             'status': self.loading_status,
+            'backend': self.backend.name,
             'progress': self.loading_progress,
             'message': self.loading_message,
             'processing_result': self.processing_result,
@@ -26,29 +25,13 @@ class AudioProcessor:
         }
     
     def load_model_with_progress(self):
-        """Load Whisper model with progress tracking"""
+        """Load transcription model with progress tracking"""
         try:
             self.loading_status = 'loading'
             self.loading_progress = 0
             self.loading_message = 'جاري تجميع الموارد...'
             
-            # Create model directory
-            os.makedirs(self.model_path, exist_ok=True)
-            
-            # Simulate progress
-            for i in range(1, 11):
-                time.sleep(0.5)
-                self.loading_progress = i * 10
-                if i <= 3:
-                    self.loading_message = 'جاري تجميع الموارد...'
-                elif i <= 7:
-                    self.loading_message = 'جاري تحميل النموذج...'
-                else:
-                    self.loading_message = 'جاري تحضير النموذج...'
-            
-            # Actually load the model
-            self.loading_message = 'جاري تحميل نموذج Whisper...'
-            self.model = whisper.load_model("medium", download_root=self.model_path)
+            self.backend.load(self._update_loading_progress)
             
             self.loading_progress = 100
             self.loading_status = 'loaded'
@@ -59,33 +42,43 @@ class AudioProcessor:
             self.loading_message = f'خطأ في تحميل النموذج: {str(e)}'
             self.loading_progress = 0
     
+    def _update_loading_progress(self, progress, message):
+        """Record model loading progress reported by the backend"""
+        self.loading_progress = progress
+        self.loading_message = message
+    
     def is_model_loaded(self):
         """Check if model is loaded"""
-        return self.model is not None and self.loading_status == 'loaded'
+        return self.backend.is_loaded() and self.loading_status == 'loaded'
     
-    def process_audio_file(self, audio_path, selected_surahs, min_words, merge_enabled):
+    def process_audio_file(self, audio_path, selected_surahs, min_words, merge_enabled, word_timestamps=False,
+                           output_dir='outputs', output_name=None):
         """Process audio file to SRT"""
         if not self.is_model_loaded():
             raise Exception("النموذج غير محمل. يرجى تحميل النموذج أولاً.")
         
         # Transcribe audio
-        result = self.model.transcribe(audio_path, language="ar", task="transcribe", verbose=False)
+        result = self.backend.transcribe(audio_path, word_timestamps)
         
         # Create SRT content
         srt_content = self._create_srt_from_segments(result["segments"])
         
-        # Save raw SRT
-        base_name = os.path.splitext(os.path.basename(audio_path))[0]
-        raw_srt_path = os.path.join('outputs', f'{base_name}_raw.srt')
+        # Save raw SRT, named after the caller's filename rather than the stored upload
+        base_name = os.path.splitext(output_name or os.path.basename(audio_path))[0]
+        raw_srt_path = os.path.join(output_dir, f'{base_name}_raw.srt')
         
         with open(raw_srt_path, 'w', encoding='utf-8') as f:
             f.write(srt_content)
         
+        # Keep word timings keyed by SRT index so they survive the round trip through the file
+        word_timings = self._extract_word_timings(result["segments"]) if word_timestamps else None
+        
         # Process with SRT processor
-        from models.srt_processor import SRTProcessor
-        srt_processor = SRTProcessor()
-        processed_result = srt_processor.process_srt_file(
-            raw_srt_path, selected_surahs, min_words, merge_enabled
+        if self.srt_processor is None:
+            from models.srt_processor import SRTProcessor
+            self.srt_processor = SRTProcessor()
+        processed_result = self.srt_processor.process_srt_file(
+            raw_srt_path, selected_surahs, min_words, merge_enabled, word_timings=word_timings
         )
         
         return {
@@ -103,6 +96,17 @@ class AudioProcessor:
             srt_content += f"{seg['text'].strip()}\n\n"
         return srt_content
     
+    def _extract_word_timings(self, segments):
+        """Extract word-level timings from Whisper segments, keyed by SRT index"""
+        word_timings = {}
+        for index, seg in enumerate(segments, 1):
+            word_timings[index] = [
+                {'word': w['word'].strip(), 'start': w['start'], 'end': w['end']}
+                for w in seg.get('words', [])
+                if w['word'].strip()
+            ]
+        return word_timings
+    
     def _format_time(self, seconds):
         """Format seconds to SRT time format"""
         h = int(seconds // 3600)
@@ -1,6 +1,8 @@
 import os
 import json
 import re
+import threading
+from collections import defaultdict
 
 class QuranDataModel:
     def __init__(self):
@@ -8,6 +10,9 @@ class QuranDataModel:
         self.surah_data_path = self._get_surah_data_path()
         self.surahs_metadata = None
         self.all_verses = None
+        self.verse_index = None
+        # Shared across request threads; guards loading so nobody sees a half-filled corpus
+        self._load_lock = threading.RLock()
         
     def _get_surahs_file_path(self):
         """Get the path to surahs.json file"""
@@ -70,39 +75,107 @@ class QuranDataModel:
     def get_all_surahs(self):
         """Get all surahs metadata"""
         if self.surahs_metadata is None:
-            self._create_sample_data()
-            try:
-                with open(self.surahs_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.surahs_metadata = data.get('result', [])
-            except FileNotFoundError:
-                self.surahs_metadata = []
+            with self._load_lock:
+                if self.surahs_metadata is None:
+                    self._create_sample_data()
+                    try:
+                        with open(self.surahs_file, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                            self.surahs_metadata = data.get('result', [])
+                    except FileNotFoundError:
+                        self.surahs_metadata = []
         
         return self.surahs_metadata
     
     def load_all_verses(self):
         """Load all verses from JSON files"""
         if self.all_verses is None:
-            self.all_verses = {}
-            surahs = self.get_all_surahs()
-            
-            for surah in surahs:
-                surah_id = surah['id']
-                surah_file = os.path.join(self.surah_data_path, f'surah_{surah_id}.json')
-                
-                if os.path.exists(surah_file):
-                    try:
-                        with open(surah_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            self.all_verses[surah_id] = data.get('verses', [])
-                    except Exception as e:
-                        print(f"Error loading surah {surah_id}: {e}")
-                        self.all_verses[surah_id] = []
-                else:
-                    self.all_verses[surah_id] = []
+            with self._load_lock:
+                if self.all_verses is None:
+                    all_verses = {}
+                    surahs = self.get_all_surahs()
+                    
+                    for surah in surahs:
+                        surah_id = surah['id']
+                        surah_file = os.path.join(self.surah_data_path, f'surah_{surah_id}.json')
+                        
+                        if os.path.exists(surah_file):
+                            try:
+                                with open(surah_file, 'r', encoding='utf-8') as f:
+                                    data = json.load(f)
+                                    all_verses[surah_id] = data.get('verses', [])
+                            except Exception as e:
+                                print(f"Error loading surah {surah_id}: {e}")
+                                all_verses[surah_id] = []
+                        else:
+                            all_verses[surah_id] = []
+                    
+                    # Publish only the complete corpus
+                    self.all_verses = all_verses
         
         return self.all_verses
     
+    def build_verse_index(self):
+        """Build hash maps from normalized verse text and fingerprints to (surah, ayah) lists"""
+        if self.verse_index is None:
+            with self._load_lock:
+                if self.verse_index is None:
+                    exact = defaultdict(list)
+                    loose = defaultdict(list)
+                    fingerprints = defaultdict(list)
+                    
+                    # load_all_verses returns the fully loaded corpus, taking the same lock if needed
+                    for surah_id, verses in sorted(self.load_all_verses().items()):
+                        for ayah_num, verse in enumerate(verses, 1):
+                            text = self.normalize_text(verse["text"]["ar"])
+                            loose_text = self.loose_text(text)
+                            exact[text].append((surah_id, ayah_num))
+                            loose[loose_text].append((surah_id, ayah_num))
+                            fingerprints[self.fingerprint(loose_text)].append((surah_id, ayah_num))
+                    
+                    # Publish only the complete index
+                    self.verse_index = {
+                        'exact': dict(exact),
+                        'loose': dict(loose),
+                        'fingerprint': dict(fingerprints)
+                    }
+        
+        return self.verse_index
+    
+    def lookup_verse(self, text):
+        """Look up (surah, ayah) candidates for text as ('exact' | 'near_exact' | None, candidates)"""
+        index = self.build_verse_index()
+        text = self.normalize_text(text)
+        
+        candidates = index['exact'].get(text)
+        if candidates:
+            return 'exact', candidates
+        
+        loose_text = self.loose_text(text)
+        candidates = list(index['loose'].get(loose_text, []))
+        for candidate in index['fingerprint'].get(self.fingerprint(loose_text), []):
+            if candidate not in candidates:
+                candidates.append(candidate)
+        if candidates:
+            return 'near_exact', sorted(candidates)
+        
+        return None, []
+    
+    @staticmethod
+    def loose_text(text):
+        """Normalize text further by unifying letter variants and dropping Quranic marks"""
+        text = re.sub(r'[\u0640\u06D6-\u06ED]', '', text)  # Remove tatweel and annotation marks
+        text = re.sub(r'[أإآٱ]', 'ا', text)  # Unify alef forms
+        text = text.replace('ى', 'ي').replace('ة', 'ه')
+        text = re.sub(r'\s+', ' ', text).strip()
+        return text
+    
+    @staticmethod
+    def fingerprint(text, size=2):
+        """Get a (word count, prefix, suffix) fingerprint of text"""
+        words = text.split()
+        return len(words), tuple(words[:size]), tuple(words[-size:])
+    
     @staticmethod
     def normalize_text(text):
         """Normalize Arabic text by removing diacritics and extra spaces"""
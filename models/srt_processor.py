@@ -1,28 +1,48 @@
 import os
 import re
+import json
 import shutil
+import threading
 from collections import defaultdict
 from Levenshtein import ratio
 from models.quran_data import QuranDataModel
 
 class SRTProcessor:
-    def __init__(self):
-        self.quran_model = QuranDataModel()
+    def __init__(self, quran_model=None):
+        self.quran_model = quran_model or QuranDataModel()
+        self.fast_path_stats = {'exact': 0, 'near_exact': 0, 'miss': 0}
+        self._stats_lock = threading.Lock()
         
-    def process_srt_file(self, srt_path, selected_surahs=None, min_words=5, merge_enabled=False):
+    def process_srt_file(self, srt_path, selected_surahs=None, min_words=5, merge_enabled=False, word_timings=None):
         """Process SRT file to match with Quran verses"""
         # Create backup
         backup_path = self._create_backup(srt_path)
         
         # Read SRT segments
         segments = self._read_srt_file(srt_path)
+        if word_timings:
+            for seg in segments:
+                seg["words"] = word_timings.get(seg["index"], [])
         
         # Load Quran data
         all_verses = self.quran_model.load_all_verses()
         surahs_metadata = self.quran_model.get_all_surahs()
         
-        # Match segments to Quran
-        grouped = self._match_segments_to_surah(segments, all_verses, selected_surahs)
+        # Match segments to Quran, counting fast path hits for this run only
+        fast_path_hits = {'exact': 0, 'near_exact': 0, 'miss': 0}
+        grouped = self._match_segments_to_surah(segments, all_verses, selected_surahs, fast_path_hits)
+        with self._stats_lock:
+            for kind, count in fast_path_hits.items():
+                self.fast_path_stats[kind] += count
+        
+        # Align word timings to the matched verses, splitting and snapping cues at word boundaries
+        if word_timings:
+            for surah_num in grouped:
+                grouped[surah_num] = [
+                    piece
+                    for item in grouped[surah_num]
+                    for piece in self._align_segment_words(item, all_verses)
+                ]
         
         # Flatten and sort segments
         all_segments = []
@@ -40,14 +60,24 @@ class SRTProcessor:
         # Create ranges file
         ranges_path = self._create_ranges_file(srt_path, grouped, surahs_metadata)
         
+        # Write per-word timing file
+        words_path = self._write_words_file(srt_path, all_segments) if word_timings else None
+        
         return {
             'processed_srt_path': processed_srt_path,
             'ranges_path': ranges_path,
+            'words_path': words_path,
             'backup_path': backup_path,
             'grouped_segments': grouped,
-            'total_segments': len(all_segments)
+            'total_segments': len(all_segments),
+            'fast_path_hits': fast_path_hits
         }
     
+    def get_fast_path_stats(self):
+        """Get cumulative fast path hits across all runs of this processor"""
+        with self._stats_lock:
+            return dict(self.fast_path_stats)
+    
     def _create_backup(self, srt_path):
         """Create backup of original SRT file"""
         if not srt_path.endswith("_backup.srt"):
@@ -102,7 +132,179 @@ class SRTProcessor:
                     break
         return matches / max(len(seg_words), 1)
     
-    def _match_segments_to_surah(self, segments, all_verses, selected_surahs=None):
+    def _align_words(self, timed_words, verse_text, surah_num, ayah_num, min_match_ratio=0.6):
+        """Align timed transcript words to the words of a verse, keeping verse order
+        
+        Dynamic programming finds the in-order pairing with the highest total similarity, so
+        dropped, extra or misheard words on either side only leave those words unaligned.
+        Every entry carries its surah and ayah, since merged cues mix words from several ayahs.
+        """
+        verse_words = verse_text.split()
+        verse_norm = [self.quran_model.normalize_text(w) for w in verse_words]
+        timed_norm = [self.quran_model.normalize_text(w["word"]) for w in timed_words]
+        
+        # best[i][j]: highest total score aligning the first i timed words with the first j verse words
+        best = [[0.0] * (len(verse_norm) + 1) for _ in range(len(timed_norm) + 1)]
+        for i, word in enumerate(timed_norm, 1):
+            for j, verse_word in enumerate(verse_norm, 1):
+                best[i][j] = max(best[i - 1][j], best[i][j - 1])
+                score = ratio(word, verse_word)
+                if score > min_match_ratio:
+                    best[i][j] = max(best[i][j], best[i - 1][j - 1] + score)
+        
+        positions = [None] * len(timed_norm)
+        i, j = len(timed_norm), len(verse_norm)
+        while i and j:
+            if best[i][j] == best[i - 1][j]:
+                i -= 1
+            elif best[i][j] == best[i][j - 1]:
+                j -= 1
+            else:
+                positions[i - 1] = j - 1
+                i -= 1
+                j -= 1
+        
+        aligned = []
+        for timed, position in zip(timed_words, positions):
+            aligned.append({
+                "word": timed["word"],
+                "start": timed["start"],
+                "end": timed["end"],
+                "surah": surah_num,
+                "ayah": ayah_num,
+                "position": None if position is None else position + 1,
+                "quran_word": None if position is None else verse_words[position]
+            })
+        
+        return aligned
+    
+    def _align_segment_words(self, item, all_verses):
+        """Align a matched segment's word timings and split it where it runs into a neighbouring ayah"""
+        seg = item["segment"]
+        timed_words = seg.get("words") or []
+        if item["match"]["surah"] == 0:
+            item["match"]["words"] = [
+                {
+                    "word": w["word"],
+                    "start": w["start"],
+                    "end": w["end"],
+                    "surah": 0,
+                    "ayah": 0,
+                    "position": None,
+                    "quran_word": None
+                }
+                for w in timed_words
+            ]
+            return [item]
+        
+        surah_num = item["match"]["surah"]
+        ayah = item["match"]["ayah"]
+        verse_text = item["match"]["match_text"]
+        words = self._align_words(timed_words, verse_text, surah_num, ayah)
+        aligned = [i for i, w in enumerate(words) if w["position"] is not None]
+        if not aligned:
+            item["match"]["words"] = words
+            return [item]
+        
+        # Words outside the aligned span either finish the previous ayah, start the next one, or are noise
+        verses = all_verses.get(surah_num, [])
+        before = self._split_off_words(seg, words[:aligned[0]], surah_num, ayah - 1, verses, at_verse_end=True)
+        after = self._split_off_words(seg, words[aligned[-1] + 1:], surah_num, ayah + 1, verses, at_verse_end=False)
+        
+        # Only a split moves the cue edge; misheard edge words otherwise stay in the cue
+        words = words[aligned[0] if before else 0:aligned[-1] + 1 if after else len(words)]
+        seg["start"] = words[0]["start"]
+        seg["end"] = words[-1]["end"]
+        item["match"]["words"] = words
+        
+        return [piece for piece in (before, item, after) if piece]
+    
+    def _split_off_words(self, seg, timed_words, surah_num, ayah_num, verses, at_verse_end, min_words=2):
+        """Build a cue for words that belong to a neighbouring ayah, or None if they don't"""
+        if len(timed_words) < min_words or not 1 <= ayah_num <= len(verses):
+            return None
+        
+        verse_text = verses[ayah_num - 1]["text"]["ar"]
+        words = self._align_words(timed_words, verse_text, surah_num, ayah_num)
+        aligned = [i for i, w in enumerate(words) if w["position"] is not None]
+        if len(aligned) < min_words:
+            return None
+        
+        # Words before a cue must end the previous ayah; words after it must start the next one
+        verse_words = verse_text.split()
+        first_position = words[aligned[0]]["position"]
+        last_position = words[aligned[-1]]["position"]
+        if at_verse_end and last_position < len(verse_words) - 1:
+            return None
+        if not at_verse_end and first_position > 2:
+            return None
+        
+        # A piece runs from the segment edge to the verse edge where the matched ayah takes over
+        if at_verse_end:
+            match_text = " ".join(verse_words[first_position - 1:])
+        else:
+            match_text = " ".join(verse_words[:last_position])
+        
+        words = words[aligned[0]:aligned[-1] + 1]
+        return {
+            "segment": {
+                "index": seg["index"],
+                "start": words[0]["start"],
+                "end": words[-1]["end"],
+                "text": " ".join(w["word"] for w in words)
+            },
+            "match": {
+                "surah": surah_num,
+                "ayah": ayah_num,
+                "match_text": match_text,
+                "words": words
+            }
+        }
+    
+    def _fast_path_match(self, seg_text, seg_words, all_verses, selected_surahs, current_ayah, ayah_tracker,
+                         fast_path_hits, min_near_exact_score=0.9):
+        """Resolve exact and near-exact matches from the verse index instead of scoring the whole window"""
+        kind, candidates = self.quran_model.lookup_verse(seg_text)
+        if kind is None:
+            fast_path_hits['miss'] += 1
+            return None
+        
+        best = None
+        best_score = 0
+        
+        # Only candidates the fuzzy search could have picked: same surahs, window and repeat limit
+        for surah_num in selected_surahs:
+            if surah_num not in all_verses:
+                continue
+            verses = all_verses[surah_num]
+            for cand_surah, ayah_num in candidates:
+                if cand_surah != surah_num:
+                    continue
+                if not max(1, current_ayah - 1) <= ayah_num < min(current_ayah + 3, len(verses) + 1):
+                    continue
+                if ayah_tracker.get((surah_num, ayah_num), 0) > 2:
+                    continue
+                
+                if kind == 'exact':
+                    fast_path_hits['exact'] += 1
+                    return 1.0, surah_num, ayah_num
+                
+                verse_text = self.quran_model.normalize_text(verses[ayah_num - 1]["text"]["ar"])
+                score = ratio(seg_text, verse_text)
+                word_score = self._word_by_word_match(seg_words, verse_text.split())
+                total_score = (score * 0.7 + word_score * 0.3)
+                if total_score > best_score:
+                    best_score = total_score
+                    best = (total_score, surah_num, ayah_num)
+        
+        if best and best_score >= min_near_exact_score:
+            fast_path_hits['near_exact'] += 1
+            return best
+        
+        fast_path_hits['miss'] += 1
+        return None
+    
+    def _match_segments_to_surah(self, segments, all_verses, selected_surahs=None, fast_path_hits=None):
         """Match SRT segments to Quranic surahs sequentially"""
         grouped = defaultdict(list)
         used_segments = set()
@@ -110,12 +312,28 @@ class SRTProcessor:
         detected_surah = None
         current_ayah = 1
         ayah_tracker = {}
+        if fast_path_hits is None:
+            fast_path_hits = {'exact': 0, 'near_exact': 0, 'miss': 0}
         
         # Detect surah if not selected
         if not selected_surahs:
             best_score = 0
             best_surah = None
-            for surah_num in range(1, min(115, len(all_verses) + 1)):
+            
+            # An exact hit scores 1.0, so the lowest surah with one wins the full scan below
+            exact_surahs = []
+            for seg in segments:
+                kind, candidates = self.quran_model.lookup_verse(seg["text"])
+                if kind == 'exact':
+                    exact_surahs.extend(
+                        surah_num for surah_num, _ in candidates
+                        if surah_num in all_verses and surah_num < min(115, len(all_verses) + 1)
+                    )
+            surahs_to_scan = [] if exact_surahs else range(1, min(115, len(all_verses) + 1))
+            if exact_surahs:
+                best_surah = min(exact_surahs)
+            
+            for surah_num in surahs_to_scan:
                 if surah_num not in all_verses:
                     continue
                 verses = all_verses[surah_num]
@@ -145,7 +363,14 @@ class SRTProcessor:
             best_surah = 0
             matched_indices = [segment_index]
             
-            for surah_num in selected_surahs:
+            fast_match = self._fast_path_match(
+                seg_text, seg_words, all_verses, selected_surahs, current_ayah, ayah_tracker, fast_path_hits
+            )
+            if fast_match:
+                best_score, best_surah, best_ayah = fast_match
+                best_text = all_verses[best_surah][best_ayah - 1]["text"]["ar"]
+            
+            for surah_num in selected_surahs if not fast_match else []:
                 if surah_num not in all_verses:
                     continue
                 verses = all_verses[surah_num]
@@ -209,6 +434,7 @@ class SRTProcessor:
             current_text = current["match"].get("match_text", current["segment"]["text"] + " (غير مطابق)")
             current_words = len(current_text.split())
             combined_texts = [(current_text, current["match"]["ayah"], current["match"]["surah"])]
+            combined_words = list(current["match"].get("words", []))
             combined_start = current["segment"]["start"]
             combined_end = current["segment"]["end"]
             j = i + 1
@@ -229,10 +455,11 @@ class SRTProcessor:
                 
                 combined_texts.append((next_text, next_ayah, next_surah))
                 combined_end = next_seg["segment"]["end"]
+                combined_words.extend(next_seg["match"].get("words", []))
                 current_words += next_words
                 j += 1
             
-            merged.append({
+            merged_item = {
                 "segment": {
                     "index": current["segment"]["index"],
                     "start": combined_start,
@@ -244,7 +471,10 @@ class SRTProcessor:
                     "ayahs": [t[1] for t in combined_texts],
                     "match_texts": [t[0] for t in combined_texts]
                 }
-            })
+            }
+            if "words" in current["match"]:
+                merged_item["match"]["words"] = combined_words
+            merged.append(merged_item)
             
             i = j
         
@@ -322,4 +552,24 @@ class SRTProcessor:
                     except IndexError:
                         continue
         
-        return ranges_path
\ No newline at end of file
+        return ranges_path
+    
+    def _write_words_file(self, srt_path, all_segments):
+        """Write per-word timing file for the processed cues"""
+        words_path = os.path.splitext(srt_path)[0] + "_words.json"
+        
+        cues = []
+        for index, segment in enumerate(all_segments, 1):
+            cues.append({
+                "index": index,
+                "start": segment["segment"]["start"],
+                "end": segment["segment"]["end"],
+                "surahs": segment["match"].get("surahs", [segment["match"].get("surah", 0)]),
+                "ayahs": segment["match"].get("ayahs", [segment["match"].get("ayah", 0)]),
+                "words": segment["match"].get("words", [])
+            })
+        
+        with open(words_path, 'w', encoding='utf-8') as f:
+            json.dump({"cues": cues}, f, ensure_ascii=False, indent=2)
+        
+        return words_path
\ No newline at end of file
@@ -0,0 +1,247 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from collections import Counter
+from werkzeug.utils import secure_filename
+
+class StorageManager:
+    def __init__(self, upload_folder='uploads', output_folder='outputs',
+                 ttl_seconds=24 * 3600, quota_bytes=5 * 1024 ** 3, sweep_interval=600):
+        self.upload_folder = upload_folder
+        self.output_folder = output_folder
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.sweep_interval = sweep_interval
+        self.last_sweep = None
+        self.removed_entries = 0
+        self.removed_bytes = 0
+        self.dedup_hits = 0
+        self._lock = threading.Lock()
+        # entry path -> number of jobs using it; pins are per-process, so only the
+        # process that serves requests (and pins) may run the sweeper
+        self._pinned = Counter()
+        self._sweeper = None
+        
+        os.makedirs(self.upload_folder, exist_ok=True)
+        os.makedirs(self.output_folder, exist_ok=True)
+    
+    def save_upload(self, file):
+        """Save an uploaded file under its content hash, reusing an identical earlier upload"""
+        extension = os.path.splitext(secure_filename(file.filename))[1].lower()
+        temp_path = os.path.join(self.upload_folder, f'.{uuid.uuid4().hex}.part')
+        digest = hashlib.sha256()
+        
+        self.pin(temp_path)
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+            
+            # uploads/<sha256>/data<ext>: identical content from any user shares one file, whose
+            # name doesn't reveal who uploaded it first; outputs are named after each caller's filename
+            object_dir = os.path.join(self.upload_folder, digest.hexdigest())
+            filepath = os.path.join(object_dir, f'data{extension}')
+            with self._lock:
+                deduplicated = os.path.exists(filepath)
+                if deduplicated:
+                    self.dedup_hits += 1
+                    os.remove(temp_path)
+                else:
+                    os.makedirs(object_dir, exist_ok=True)
+                    os.replace(temp_path, filepath)
+                self.touch(object_dir)
+        finally:
+            self.unpin(temp_path)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        # Enforce the quota as uploads arrive instead of waiting for the next sweep
+        if not deduplicated:
+            self.pin(filepath)
+            try:
+                entries = self._list_entries()
+                with self._lock:
+                    kept = sum(e['size'] for e in entries if self._pinned[os.path.abspath(e['path'])] > 0)
+                # Evicting can't make room if pinned entries alone exceed the quota, so don't try
+                fits = kept <= self.quota_bytes and self._evict_to_quota(entries) <= self.quota_bytes
+            finally:
+                self.unpin(filepath)
+            if not fits:
+                entry = next((e for e in self._list_entries() if e['path'] == object_dir), None)
+                if entry:
+                    self._remove_entry(entry)
+                raise Exception('Storage quota exceeded')
+        
+        return filepath, deduplicated
+    
+    def create_job(self):
+        """Create a per-job output directory and return its id and path"""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.output_folder, job_id)
+        os.makedirs(job_dir)
+        return job_id, job_dir
+    
+    def get_job_dir(self, job_id):
+        """Get the directory of an existing job, or None for unknown ids"""
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id or ''):
+            return None
+        job_dir = os.path.join(self.output_folder, job_id)
+        return job_dir if os.path.isdir(job_dir) else None
+    
+    def stage_in_job(self, source_path, job_dir, filename=None):
+        """Copy an uploaded file into a job directory under the caller's filename, so its outputs are written beside it"""
+        staged_path = os.path.join(job_dir, secure_filename(filename or '') or os.path.basename(source_path))
+        shutil.copy(source_path, staged_path)
+        self.touch(self._entry_for(source_path))
+        return staged_path
+    
+    def touch(self, path):
+        """Mark a stored entry as recently used"""
+        if path and os.path.exists(path):
+            os.utime(path, None)
+    
+    def pin(self, path):
+        """Protect an entry from this process's sweeper while it is in use"""
+        with self._lock:
+            self._pinned[os.path.abspath(self._entry_for(path))] += 1
+    
+    def unpin(self, path):
+        """Release one pin() on an entry; it stays protected until every pin is released"""
+        key = os.path.abspath(self._entry_for(path))
+        with self._lock:
+            self._pinned[key] -= 1
+            if self._pinned[key] <= 0:
+                del self._pinned[key]
+        self.touch(self._entry_for(path))
+    
+    def _entry_for(self, path):
+        """Get the top-level upload/output entry that contains a path"""
+        path = os.path.abspath(path)
+        for folder in (self.upload_folder, self.output_folder):
+            root = os.path.abspath(folder)
+            if os.path.dirname(path) == root:
+                return path
+            if path.startswith(root + os.sep):
+                return os.path.join(root, os.path.relpath(path, root).split(os.sep)[0])
+        return path
+    
+    def _list_entries(self):
+        """List top-level entries of the storage folders with their size and last use"""
+        entries = []
+        for folder in (self.upload_folder, self.output_folder):
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        size = self._entry_size(entry)
+                        last_used = entry.stat(follow_symlinks=False).st_mtime
+                    except FileNotFoundError:
+                        # Removed by a concurrent request or sweep
+                        continue
+                    entries.append({
+                        'path': entry.path,
+                        'folder': folder,
+                        'size': size,
+                        'last_used': last_used
+                    })
+        return entries
+    
+    def _entry_size(self, entry):
+        """Get the total size of a file or directory entry"""
+        if not entry.is_dir(follow_symlinks=False):
+            return entry.stat(follow_symlinks=False).st_size
+        total = 0
+        for root, _, files in os.walk(entry.path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+    
+    def _remove_entry(self, entry):
+        """Remove a stored entry unless it is pinned or was used after it was listed"""
+        with self._lock:
+            if self._pinned[os.path.abspath(entry['path'])] > 0:
+                return False
+            # save_upload may have reused (and touched) the entry since _list_entries ran
+            try:
+                last_used = os.stat(entry['path'], follow_symlinks=False).st_mtime
+            except FileNotFoundError:
+                return False
+            if last_used != entry['last_used']:
+                return False
+            if os.path.isdir(entry['path']):
+                shutil.rmtree(entry['path'], ignore_errors=True)
+            elif os.path.exists(entry['path']):
+                os.remove(entry['path'])
+            self.removed_entries += 1
+            self.removed_bytes += entry['size']
+        return True
+    
+    def sweep(self):
+        """Remove expired entries, then evict least recently used ones until under quota"""
+        now = time.time()
+        entries = self._list_entries()
+        remaining = []
+        
+        for entry in entries:
+            if now - entry['last_used'] > self.ttl_seconds and self._remove_entry(entry):
+                continue
+            remaining.append(entry)
+        
+        total = self._evict_to_quota(remaining)
+        self.last_sweep = now
+        return total
+    
+    def _evict_to_quota(self, entries):
+        """Evict least recently used entries until under quota; returns the remaining total size"""
+        total = sum(entry['size'] for entry in entries)
+        if total > self.quota_bytes:
+            for entry in sorted(entries, key=lambda e: e['last_used']):
+                if total <= self.quota_bytes:
+                    break
+                if self._remove_entry(entry):
+                    total -= entry['size']
+        return total
+    
+    def start_sweeper(self):
+        """Start the background TTL/LRU sweeper thread; call it from the serving process only"""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._run_sweeper, daemon=True)
+        self._sweeper.start()
+    
+    def _run_sweeper(self):
+        """Sweep storage every sweep_interval seconds"""
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Storage sweep failed: {e}")
+            time.sleep(self.sweep_interval)
+    
+    def get_usage_stats(self):
+        """Get storage usage statistics"""
+        entries = self._list_entries()
+        uploads = [e for e in entries if e['folder'] == self.upload_folder]
+        outputs = [e for e in entries if e['folder'] == self.output_folder]
+        total = sum(e['size'] for e in entries)
+        return {
+            'total_bytes': total,
+            'quota_bytes': self.quota_bytes,
+            'quota_used': total / self.quota_bytes if self.quota_bytes else 0,
+            'uploads': {'count': len(uploads), 'bytes': sum(e['size'] for e in uploads)},
+            'outputs': {'count': len(outputs), 'bytes': sum(e['size'] for e in outputs)},
+            'pinned': len(self._pinned),
+            'dedup_hits': self.dedup_hits,
+            'removed_entries': self.removed_entries,
+            'removed_bytes': self.removed_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'last_sweep': self.last_sweep
+        }
\ No newline at end of file
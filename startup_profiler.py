@@ -0,0 +1,102 @@
+import sys
+import time
+import importlib.abc
+from contextlib import contextmanager
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.import_times = {}  # module -> (inclusive seconds, self seconds)
+        self.init_times = {}
+        self._finder = None
+        self._stack = []
+    
+    def install(self):
+        """Start timing every module imported from now on"""
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+    
+    def uninstall(self):
+        """Stop timing imports"""
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+    
+    @contextmanager
+    def measure_import(self, name):
+        """Time the execution of one module, excluding nested imports from its self time"""
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.import_times[name] = (elapsed, elapsed - nested)
+            if self._stack:
+                self._stack[-1] += elapsed
+    
+    @contextmanager
+    def measure_init(self, name):
+        """Time the construction of a component"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.init_times[name] = time.perf_counter() - start
+    
+    def report(self, limit=20):
+        """Format the collected import and init timings"""
+        lines = ['Startup profile', '']
+        lines.append(f"{'import (inclusive / self ms)':<50}{'incl':>10}{'self':>10}")
+        slowest = sorted(self.import_times.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (inclusive, own) in slowest[:limit]:
+            lines.append(f'{name:<50}{inclusive * 1000:>10.1f}{own * 1000:>10.1f}')
+        if len(slowest) > limit:
+            lines.append(f'... {len(slowest) - limit} more modules')
+        
+        lines.append('')
+        lines.append(f"{'init (ms)':<50}{'time':>10}")
+        for name, elapsed in self.init_times.items():
+            lines.append(f'{name:<50}{elapsed * 1000:>10.1f}')
+        
+        # resource is Unix-only, and only the report needs it; ru_maxrss is in kilobytes on Linux
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        lines.append('')
+        lines.append(f'modules imported: {len(self.import_times)}')
+        lines.append(f'total startup: {(time.perf_counter() - self.started) * 1000:.1f} ms')
+        lines.append(f'max RSS: {max_rss:.1f} MB')
+        return '\n'.join(lines)
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler):
+        self.profiler = profiler
+    
+    def find_spec(self, fullname, path, target=None):
+        """Find the module with the remaining finders and wrap its loader with a timer"""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimingLoader(spec.loader, self.profiler)
+                return spec
+        return None
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+    
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+    
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+    
+    def exec_module(self, module):
+        with self.profiler.measure_import(module.__name__):
+            self.loader.exec_module(module)
\ No newline at end of file
@@ -0,0 +1,67 @@
+import unittest
+from models.quran_data import QuranDataModel
+from models.srt_processor import SRTProcessor
+
+AYAH_2_4 = 'وَٱلَّذِينَ يُؤۡمِنُونَ بِمَآ أُنزِلَ إِلَيۡكَ وَمَآ أُنزِلَ مِن قَبۡلِكَ وَبِٱلۡأٓخِرَةِ هُمۡ يُوقِنُونَ'
+AYAH_2_5 = 'أُوْلَـٰٓئِكَ عَلَىٰ هُدٗى مِّن رَّبِّهِمۡۖ وَأُوْلَـٰٓئِكَ هُمُ ٱلۡمُفۡلِحُونَ'
+AYAH_2_255 = (
+    'ٱللَّهُ لَآ إِلَٰهَ إِلَّا هُوَ ٱلۡحَيُّ ٱلۡقَيُّومُۚ لَا تَأۡخُذُهُۥ سِنَةٞ وَلَا نَوۡمٞۚ لَّهُۥ مَا فِي ٱلسَّمَٰوَٰتِ '
+    'وَمَا فِي ٱلۡأَرۡضِۗ مَن ذَا ٱلَّذِي يَشۡفَعُ عِندَهُۥٓ إِلَّا بِإِذۡنِهِۦۚ يَعۡلَمُ مَا بَيۡنَ أَيۡدِيهِمۡ وَمَا خَلۡفَهُمۡۖ '
+    'وَلَا يُحِيطُونَ بِشَيۡءٖ مِّنۡ عِلۡمِهِۦٓ إِلَّا بِمَا شَآءَۚ وَسِعَ كُرۡسِيُّهُ ٱلسَّمَٰوَٰتِ وَٱلۡأَرۡضَۖ '
+    'وَلَا يَـُٔودُهُۥ حِفۡظُهُمَاۚ وَهُوَ ٱلۡعَلِيُّ ٱلۡعَظِيمُ'
+)
+
+class AlignSegmentWordsTest(unittest.TestCase):
+    def setUp(self):
+        self.processor = SRTProcessor(QuranDataModel())
+        verses = [{"text": {"ar": ""}} for _ in range(256)]
+        for ayah, text in ((4, AYAH_2_4), (5, AYAH_2_5), (255, AYAH_2_255)):
+            verses[ayah - 1] = {"text": {"ar": text}}
+        self.all_verses = {2: verses}
+    
+    def _item(self, words, ayah):
+        """Build a matched cue whose timed words are the normalized transcript words, 0.5 s apart"""
+        normalize = self.processor.quran_model.normalize_text
+        timed = [
+            {"word": normalize(word), "start": i * 0.5, "end": (i + 1) * 0.5}
+            for i, word in enumerate(words)
+        ]
+        return {
+            "segment": {"index": 1, "start": 0.0, "end": len(words) * 0.5, "text": " ".join(w["word"] for w in timed), "words": timed},
+            "match": {"surah": 2, "ayah": ayah, "match_text": self.all_verses[2][ayah - 1]["text"]["ar"]}
+        }
+    
+    def test_splits_off_the_end_of_the_previous_ayah(self):
+        words = AYAH_2_4.split()[-3:] + AYAH_2_5.split()
+        pieces = self.processor._align_segment_words(self._item(words, 5), self.all_verses)
+        
+        self.assertEqual([piece["match"]["ayah"] for piece in pieces], [4, 5])
+        self.assertEqual(pieces[0]["match"]["match_text"], " ".join(AYAH_2_4.split()[-3:]))
+        self.assertEqual(pieces[0]["segment"]["end"], 1.5)
+        self.assertEqual(pieces[1]["match"]["match_text"], AYAH_2_5)
+        self.assertEqual(pieces[1]["segment"]["start"], 1.5)
+        self.assertEqual([w["position"] for w in pieces[1]["match"]["words"]], list(range(1, len(AYAH_2_5.split()) + 1)))
+        self.assertEqual({(w["surah"], w["ayah"]) for w in pieces[0]["match"]["words"]}, {(2, 4)})
+        self.assertEqual({(w["surah"], w["ayah"]) for w in pieces[1]["match"]["words"]}, {(2, 5)})
+    
+    def test_dropped_words_do_not_unalign_the_rest_of_the_verse(self):
+        verse_words = AYAH_2_255.split()
+        words = verse_words[:10] + verse_words[14:]
+        pieces = self.processor._align_segment_words(self._item(words, 255), self.all_verses)
+        
+        self.assertEqual(len(pieces), 1)
+        self.assertEqual(pieces[0]["match"]["match_text"], AYAH_2_255)
+        positions = [w["position"] for w in pieces[0]["match"]["words"]]
+        self.assertEqual(positions, list(range(1, 11)) + list(range(15, len(verse_words) + 1)))
+    
+    def test_misheard_edge_words_keep_the_full_verse_text(self):
+        words = ["ولكن"] + AYAH_2_5.split()[1:-1] + ["المفحلين"]
+        pieces = self.processor._align_segment_words(self._item(words, 5), self.all_verses)
+        
+        self.assertEqual(len(pieces), 1)
+        self.assertEqual(pieces[0]["match"]["match_text"], AYAH_2_5)
+        self.assertEqual(len(pieces[0]["match"]["words"]), len(words))
+        self.assertEqual((pieces[0]["segment"]["start"], pieces[0]["segment"]["end"]), (0.0, len(words) * 0.5))
+
+if __name__ == '__main__':
+    unittest.main()